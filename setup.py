@@ -24,6 +24,7 @@ setuptools.setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    install_requires=['yfinance', 'pandas', 'numpy']
+    install_requires=['yfinance', 'pandas', 'numpy'],
+    extras_require={'numba': ['numba']}
 
 )
@@ -1,6 +1,7 @@
 # Importing data management packages:
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+import time
 import numpy as np
 
 # Importing Yahoo Finance data api:
@@ -9,6 +10,406 @@ import yfinance as yf
 # Import database api pacakges:
 import sqlite3
 
+# Importing the thread pool used for concurrent downloads:
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Importing the decorator used to build the transaction context manager:
+from contextlib import contextmanager
+
+# Importing numba to compile the technical indicator kernels, it is an optional
+# dependency and the kernels fall back to pandas if it is not installed:
+try:
+    from numba import njit
+
+except ImportError:
+    njit = None
+
+
+# <---------------------------Download Helpers-------------------------------->
+
+# Function that retries a download with an exponential backoff:
+def _retry(function, attempts=2, backoff=1.0):
+    '''
+    Function calls the input function and, if it raises an exception, retries it
+    after waiting an exponentially increasing backoff so that a transient network
+    error does not fail a ticker's update. The exception of the last attempt is
+    raised if every attempt fails.
+
+    Parameters
+    ----------
+    function : callable
+        The function, taking no arguments, that is called.
+
+    attempts : int
+        The maximum number of times the function is called. It is by default 2.
+
+    backoff : float
+        The number of seconds waited before the first retry, doubling on each
+        later retry. It is by default 1.0.
+
+    Returns
+    -------
+    result : object
+        The value returned by the function.
+    '''
+    for attempt in range(attempts):
+        try:
+            return function()
+
+        except Exception:
+            if attempt == attempts - 1:
+                raise
+
+            time.sleep(backoff * 2**attempt)
+
+
+# <---------------------------Technical Indicator Kernels---------------------->
+
+# The exponentially weighted averages of the technicals, whose states are saved in
+# the Technicals_State table, each with the values it averages, its smoothing
+# factor and the minimum number of observations it needs:
+_EWM_INDICATORS = {
+    'Twelve_EMA': ('Close', 2/(12+1), 1), # 12-Day
+    'Twenty_Six_EMA': ('Close', 2/(24+1), 1), # 24-Day
+    'Fifty_EMA': ('Close', 2/(50+1), 1), # 50-Day
+    'Two_Hundred_EMA': ('Close', 2/(200+1), 1), # 200-Day
+    'RSI_Up': ('Up_Change', 1/14, 14), # 14-Day
+    'RSI_Down': ('Down_Change', 1/14, 14)} # 14-Day
+
+# Function that computes exponentially weighted moving averages over an array:
+def _ewm_mean_loop(values, alphas, min_periods, states):
+    '''
+    The scalar recurrence behind pandas' Series.ewm(alpha=alpha, adjust=True).mean()
+    written as a single loop over a float64 array so that it can be compiled by
+    numba. It follows pandas' handling of missing values (ignore_na=False) so the
+    results match pandas.
+
+    The averages of every smoothing factor are calculated in the same pass over
+    the array, each row updating one state per average. The recurrence starts
+    from, and leaves its final values in, the input states array so that a later
+    call can continue the averages from where this one stopped.
+
+    Parameters
+    ----------
+    values : numpy array
+        The float64 array of values being averaged.
+
+    alphas : numpy array
+        The float64 array of the smoothing factors of the averages, 2/(span+1) for
+        a span or 1/(1+com) for a center of mass.
+
+    min_periods : int
+        The minimum number of observations needed before a value is returned,
+        earlier values are NaN.
+
+    states : numpy array
+        The 2D float64 array with one [weighted average, sum of weights, number
+        of observations] row per average, [nan, 1.0, 0.0] before the first value.
+        It is updated in place.
+
+    Returns
+    -------
+    result : numpy array
+        The 2D float64 array of the exponentially weighted moving averages with
+        one row per smoothing factor.
+    '''
+    result = np.empty((len(alphas), len(values)))
+
+    for i in range(len(values)):
+        cur = values[i]
+        is_observation = not np.isnan(cur)
+
+        for k in range(len(alphas)):
+            if is_observation:
+                states[k, 2] += 1.0
+
+            if not np.isnan(states[k, 0]):
+                states[k, 1] *= 1.0 - alphas[k]
+
+                if is_observation:
+                    if states[k, 0] != cur:
+                        states[k, 0] = (states[k, 1] * states[k, 0] + cur) / (states[k, 1] + 1.0)
+
+                    states[k, 1] += 1.0
+
+            elif is_observation:
+                states[k, 0] = cur
+
+            result[k, i] = states[k, 0] if states[k, 2] >= min_periods else np.nan
+
+    return result
+
+# Compiling the kernel if numba is installed (fastmath is not used as it assumes
+# there are no NaN values, which the leading rolling windows are full of):
+if njit != None:
+    _ewm_mean_loop = njit(cache=True)(_ewm_mean_loop)
+
+# Function that computes an exponentially weighted moving average over an array:
+def ewm_mean(values, alpha, min_periods=1):
+    '''
+    Function returns the same values as pandas' Series.ewm(alpha=alpha,
+    min_periods=min_periods).mean() for a float64 array, using the numba compiled
+    _ewm_mean_loop() kernel if numba is installed and pandas if it is not.
+
+    Parameters
+    ----------
+    values : numpy array
+        The float64 array of values being averaged.
+
+    alpha : float
+        The smoothing factor of the average, 2/(span+1) for a span or 1/(1+com)
+        for a center of mass.
+
+    min_periods : int
+        The minimum number of observations needed before a value is returned. It
+        is by default 1.
+
+    Returns
+    -------
+    result : numpy array
+        The float64 array of the exponentially weighted moving average.
+    '''
+    if njit == None:
+        return pd.Series(values).ewm(alpha=alpha, min_periods=min_periods).mean().to_numpy()
+
+    return _ewm_mean_loop(values, np.array([alpha]), max(min_periods, 1), np.array([[np.nan, 1.0, 0.0]]))[0]
+
+# Function that continues exponentially weighted moving averages from a saved state:
+def _ewm_mean_checkpoint(values, alphas, min_periods, states):
+    '''
+    Function continues the exponentially weighted moving averages of the
+    _ewm_mean_loop() kernel from their saved states over an array of new values.
+    It also returns the states of the averages as of the second to last value,
+    the states the averages have to be continued from if the last value is later
+    replaced.
+
+    Without numba the kernel runs as plain python, so averages started from a
+    fresh state (a whole price history) are calculated with pandas instead and
+    their states are derived from the observed values.
+
+    Parameters
+    ----------
+    values : numpy array
+        The float64 array of values being averaged.
+
+    alphas : numpy array
+        The float64 array of the smoothing factors of the averages.
+
+    min_periods : int
+        The minimum number of observations needed before a value is returned.
+
+    states : numpy array
+        The 2D float64 array of [weighted average, sum of weights, number of
+        observations] states the averages are continued from, see
+        _ewm_mean_loop(). It is updated in place.
+
+    Returns
+    -------
+    result : numpy array
+        The 2D float64 array of the exponentially weighted moving averages with
+        one row per smoothing factor.
+
+    checkpoint : numpy array
+        The 2D states array of the averages as of the second to last value.
+    '''
+    if njit == None and len(values) > 0 and (states[:, 2] == 0).all():
+        observed = ~np.isnan(values)
+        nobs = np.cumsum(observed)
+
+        result = np.empty((len(alphas), len(values)))
+        checkpoint = states.copy()
+        for k, alpha in enumerate(alphas):
+            weighted = pd.Series(values).ewm(alpha=alpha).mean().to_numpy()
+            result[k] = np.where(nobs >= min_periods, weighted, np.nan)
+
+            # Deriving the state as of the second to last and the last value, the sum
+            # of weights being the decayed weight of every observation so far:
+            for state, t in ((checkpoint, len(values) - 2), (states, len(values) - 1)):
+                if t >= 0 and nobs[t] > 0:
+                    state[k] = (weighted[t], np.sum((1.0 - alpha)**(t - np.flatnonzero(observed[:t+1]))), nobs[t])
+
+        return result, checkpoint
+
+    head = _ewm_mean_loop(values[:-1], alphas, min_periods, states)
+    checkpoint = states.copy()
+
+    return np.concatenate((head, _ewm_mean_loop(values[-1:], alphas, min_periods, states)), axis=1), checkpoint
+
+# Function that splits the changes of a price array into its gains and losses:
+def _price_changes(values):
+    '''
+    Function calculates the change of each element of an array from its previous
+    element and splits them into the positive changes and the (positive)
+    magnitudes of the negative changes, the inputs of the RSI's averages. The
+    first element has no previous element so its changes are NaN.
+
+    Parameters
+    ----------
+    values : numpy array
+        The float64 array of prices.
+
+    Returns
+    -------
+    up_change : numpy array
+        The float64 array of the positive changes, 0 where the price fell.
+
+    down_change : numpy array
+        The float64 array of the magnitudes of the negative changes, 0 where the
+        price rose.
+    '''
+    # Creating an array of values that is the difference between each element
+    # and its previous element:
+    price_difference = np.diff(values, prepend=np.nan)
+
+    # Splitting the differences into the positive changes and the (positive)
+    # magnitudes of the negative changes in a single branchless pass each:
+    up_change = np.where(price_difference > 0, price_difference, 0.0)
+    down_change = np.where(price_difference < 0, -price_difference, 0.0)
+
+    # Keeping missing differences (the first element) missing rather than
+    # averaging them in as a change of 0:
+    missing = np.isnan(price_difference)
+    up_change[missing] = np.nan
+    down_change[missing] = np.nan
+
+    return up_change, down_change
+
+# Function that computes rolling means and return volatilities in one sweep:
+def _rolling_stats_loop(close, mean_windows, std_windows):
+    '''
+    Computes the rolling means of the close prices and the rolling standard
+    deviations of their daily returns for every window in a single loop over the
+    array, updating a running sum (and a running mean and sum of squared
+    deviations for the standard deviations) as each row enters and leaves a
+    window. It follows pandas' rolling(window).mean() and
+    pct_change().rolling(window).std() so that a window holding a missing value
+    is NaN.
+
+    Parameters
+    ----------
+    close : numpy array
+        The float64 array of close prices.
+
+    mean_windows : numpy array
+        The int64 array of window lengths of the rolling means.
+
+    std_windows : numpy array
+        The int64 array of window lengths of the rolling standard deviations.
+
+    Returns
+    -------
+    means : numpy array
+        The 2D float64 array of rolling means with one row per mean window.
+
+    stds : numpy array
+        The 2D float64 array of rolling standard deviations of the daily returns
+        with one row per standard deviation window.
+    '''
+    n = len(close)
+    means = np.full((len(mean_windows), n), np.nan)
+    stds = np.full((len(std_windows), n), np.nan)
+
+    # Calculating the daily returns the same way as pct_change():
+    returns = np.full(n, np.nan)
+    for i in range(1, n):
+        returns[i] = close[i] / close[i-1] - 1.0
+
+    sums = np.zeros(len(mean_windows))
+    mean_nobs = np.zeros(len(mean_windows), dtype=np.int64)
+    std_means = np.zeros(len(std_windows))
+    std_ssqdms = np.zeros(len(std_windows))
+    std_nobs = np.zeros(len(std_windows), dtype=np.int64)
+
+    for i in range(n):
+
+        # Adding the new price to and removing the window-tail price from each sum:
+        for k in range(len(mean_windows)):
+            window = mean_windows[k]
+
+            if not np.isnan(close[i]):
+                sums[k] += close[i]
+                mean_nobs[k] += 1
+
+            if i >= window and not np.isnan(close[i-window]):
+                sums[k] -= close[i-window]
+                mean_nobs[k] -= 1
+
+            if mean_nobs[k] >= window:
+                means[k, i] = sums[k] / mean_nobs[k]
+
+        # Updating the running mean and sum of squared deviations the way pandas does:
+        for k in range(len(std_windows)):
+            window = std_windows[k]
+
+            if not np.isnan(returns[i]):
+                std_nobs[k] += 1
+                delta = returns[i] - std_means[k]
+                std_means[k] += delta / std_nobs[k]
+                std_ssqdms[k] += ((std_nobs[k] - 1) * delta ** 2) / std_nobs[k]
+
+            if i >= window and not np.isnan(returns[i-window]):
+                std_nobs[k] -= 1
+
+                if std_nobs[k] > 0:
+                    delta = returns[i-window] - std_means[k]
+                    std_means[k] -= delta / std_nobs[k]
+                    std_ssqdms[k] -= ((std_nobs[k] + 1) * delta ** 2) / std_nobs[k]
+
+                else:
+                    std_means[k] = 0.0
+                    std_ssqdms[k] = 0.0
+
+            if std_nobs[k] >= window and std_nobs[k] > 1:
+                stds[k, i] = np.sqrt(max(std_ssqdms[k] / (std_nobs[k] - 1), 0.0))
+
+    return means, stds
+
+# Compiling the kernel if numba is installed:
+if njit != None:
+    _rolling_stats_loop = njit(cache=True)(_rolling_stats_loop)
+
+# Function that computes the rolling means and volatilities of a close price array:
+def rolling_stats(close, mean_windows, std_windows):
+    '''
+    Function returns the same values as pandas' rolling(window).mean() of the
+    close prices and pct_change().rolling(window).std() of their daily returns
+    for each window, using the numba compiled _rolling_stats_loop() kernel if
+    numba is installed and pandas if it is not.
+
+    Parameters
+    ----------
+    close : numpy array
+        The float64 array of close prices.
+
+    mean_windows : tuple
+        The window lengths of the rolling means.
+
+    std_windows : tuple
+        The window lengths of the rolling standard deviations of the returns.
+
+    Returns
+    -------
+    means : numpy array
+        The 2D float64 array of rolling means with one row per mean window.
+
+    stds : numpy array
+        The 2D float64 array of rolling standard deviations of the daily returns
+        with one row per standard deviation window.
+    '''
+    if njit == None:
+        close_series = pd.Series(close)
+        daily_returns = close_series.pct_change()
+
+        means = np.array([close_series.rolling(window).mean().to_numpy()
+            for window in mean_windows]).reshape(len(mean_windows), len(close))
+        stds = np.array([daily_returns.rolling(window).std().to_numpy()
+            for window in std_windows]).reshape(len(std_windows), len(close))
+
+        return means, stds
+
+    return _rolling_stats_loop(close, np.asarray(mean_windows, dtype=np.int64),
+        np.asarray(std_windows, dtype=np.int64))
+
 
 # Object that represents the connection in the sqlite3 database:
 class stock_timeseries_api(object):
@@ -29,43 +430,92 @@ class stock_timeseries_api(object):
     """
     def __init__(self, db_path):
 
-        # Creating the database connection:
-        self.con = sqlite3.connect(db_path)
+        # Creating the database connection, with a statement cache large enough to
+        # keep the prepared statements of every ticker table in a batch update. The
+        # connection is in autocommit mode (isolation_level=None) so that sqlite3
+        # never opens or commits transactions implicitly, all of the writes are
+        # grouped by explicit BEGIN/COMMIT statements via _transaction():
+        self.con = sqlite3.connect(db_path, isolation_level=None, cached_statements=512)
 
         # Creating a connection cursor to interact with the database:
         self.c = self.con.cursor()
 
-        # Ensuring that the sqlite3 database supports foreign keys:
-        self.c.execute("PRAGMA foreign_keys")
-
-        # Enabling foreign key support if it is disabled:
-        if self.c.fetchall()[0][0] == 0:
-
-            self.c.execute("PRAGMA foreign_keys = ON")
-
-        # Creating the main database Summary table if it does not exists:
-        self.c.execute(
-        """CREATE TABLE IF NOT EXISTS Summary (
-            Ticker TEXT Primary Key UNIQUE,
-            Last_updated TEXT)"""
-            )
-
-        self.con.commit()
+        # Tuning the connection and creating the api's tables in a single script. WAL
+        # journaling with synchronous=NORMAL removes the fsync from every commit, a
+        # 64MB page cache and in-memory temp storage absorb the bulk table writes, a
+        # 256MB memory map lets reads skip the read() syscalls, busy_timeout waits out
+        # other writers and foreign key support is enabled (setting it is idempotent).
+        # The tables are created in one transaction after the pragmas, as the journal
+        # mode cannot be changed inside a transaction. The tables are the main Summary
+        # table, the table of the tickers that have failed to update (so that tickers
+        # that fail repeatedly are not downloaded again on every update) and the table
+        # of the saved states of each ticker's exponentially weighted averages (used to
+        # update the technicals without recalculating every price):
+        self.c.executescript(
+            """PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA cache_size=-65536;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA mmap_size=268435456;
+            PRAGMA busy_timeout=5000;
+            PRAGMA foreign_keys=ON;
+
+            BEGIN;
+
+            CREATE TABLE IF NOT EXISTS Summary (
+                Ticker TEXT Primary Key UNIQUE,
+                Last_updated TEXT);
+
+            CREATE TABLE IF NOT EXISTS Bad_Tickers (
+                Ticker TEXT Primary Key UNIQUE,
+                Last_failed TEXT,
+                Failures INTEGER);
+
+            CREATE TABLE IF NOT EXISTS Technicals_State (
+                Ticker TEXT,
+                Indicator TEXT,
+                Date TEXT,
+                Weighted REAL,
+                Old_Wt REAL,
+                Nobs INTEGER,
+                PRIMARY KEY (Ticker, Indicator));
+
+            COMMIT;""")
+
+        # List of the (ticker, exception) pairs that failed in the last update_tickers():
+        self._last_batch_errors = []
+
+        # Cache of yfinance Ticker objects so a ticker's Yahoo session is reused:
+        self._ticker_cache = {}
+
+        # Cache of the SQL strings built for each table, keyed by (operation, table, columns):
+        self._stmt_cache = {}
+
+        # Set of the tables in the database so ticker tables are only created once:
+        self._known_tables = {
+            table[0] for table in self.c.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+
+        # Ensuring ticker tables written by older versions can be upserted into:
+        self._index_legacy_tables()
+
+        # Letting sqlite refresh the query planner statistics of any table that needs
+        # it (0x10000 checks every table, as recommended for long lived connections):
+        self.c.execute("PRAGMA optimize=0x10002")
 
 # <---------------------------Database Writing Methods------------------------->
 
     # Method that ensures that a ticker table contains the most recent timeseries information:
-    def update_ticker(self, ticker):
+    def update_ticker(self, ticker, commit=True, initial_period='max', as_of=None, force=False):
         '''
         This is the main method for writing pricing data from the Yahoo Finance
         API to the sqlite database.
 
         It does this by either creating a table and populating it if it does not
-        exist or, if a ticker_timeseries does exist, It replaces the data in the
-        table with the most recent pricing data. It also calculates the timeseries
-        technical data associated with the price dataframe and writes that technical
-        dataframe to the ticker_technicals table while updating the Summary database
-        ticker,
+        exist or, if a ticker_timeseries does exist, by downloading only the pricing
+        data since the most recent date already in the table and appending it. It
+        also calculates the timeseries technical data associated with the price
+        dataframe and writes the new technical rows to the ticker_technicals table
+        while updating the Summary database ticker,
 
         See Docs for a more detailed description.
 
@@ -74,55 +524,47 @@ class stock_timeseries_api(object):
         ticker : str
             This is the ticker symbol of the security being updated. It is used to
             call data from Yahoo Finance via the api.
-        '''
-        # Creating the tablename for the ticker:
-        ticker_table = f'{ticker}_timeseries'
-
-        # Creating the ticker table if it does not exist:
-        self.c.execute(
-            f"""CREATE TABLE IF NOT EXISTS {ticker_table} (
-                Date TEXT Primary Key,
-                Open REAL,
-                High REAL,
-                Low REAL,
-                Close REAL,
-                Volume INTEGER,
-                Dividends REAL,
-                Stock_Splits REAL)""")
-
-        # Writing table changes to database before performing table insertions:
-        self.con.commit()
-
-        # Initalizing the Yahoo Finance API Ticker method:
-        ticker_obj = yf.Ticker(ticker)
-
-        # Creating dataframe of timeseries and formatting it for database:
-        df = ticker_obj.history(period = 'max').rename(columns = {'Stock Splits': 'Stock_Splits'})
-        df.reset_index(inplace=True)
-        df.Date = df.Date.apply(lambda x : x.date())
-        df.set_index('Date', inplace = True)
 
-        # Writing dataframe to database:
-        df.to_sql(ticker_table, con=self.con, if_exists = 'replace')
-
-        # Debug print:
-        print(f'[WRITTEN]: {ticker} Timeseries')
+        commit : bool
+            Whether the ticker is written in its own transaction that is committed
+            once the ticker is written. If False the writes are left in the caller's
+            open transaction, this is used by update_tickers() so that a whole batch
+            of tickers is written in a single transaction. It is by default True.
+
+        initial_period : str
+            The yfinance period string ('1y', '5y', 'max' etc) of the price history
+            that is downloaded when the ticker's table is first populated. A shorter
+            period means a smaller Yahoo Finance download and fewer rows to write.
+            It is by default 'max'.
+
+        as_of : datetime.date
+            The date recorded as the ticker's Last_updated value in the Summary table.
+            It is by default None, in which case today's date is used.
+
+        force : bool
+            Whether the ticker is updated even if its Last_updated value in the
+            Summary table is already the as_of date. It is by default False, in
+            which case a ticker that was already updated today is skipped without
+            calling Yahoo Finance.
+        '''
+        # Reading the clock once for the Summary table's Last_updated value:
+        if as_of == None:
+            as_of = datetime.now().date()
 
-        # Executing the update_timeseries_technicals() method to write technical
-        # data to the database:
-        self.update_timeseries_technicals(ticker)
+        # Skipping the download and all the writes if the ticker is already up to date:
+        if not force and ticker in self._updated_tickers([ticker], as_of):
+            print(f'[SKIPPED]: {ticker} already updated {as_of}')
+            return
 
-        # Updating/Writing data to the Summary Data table:
-        self.c.execute(
-            """INSERT OR REPLACE INTO Summary (Ticker, Last_updated)
-            VALUES (:ticker, :Last_updated)""",
-            {'ticker':ticker, 'Last_updated': datetime.now().date()})
+        # Downloading the price history and writing it to the database in a single
+        # transaction (the download is done first so it does not hold the write lock):
+        df, replace = self._fetch_history(ticker, initial_period, self._stored_range(ticker))
 
-        # Writing changes to db:
-        self.con.commit()
+        with self._transaction(commit):
+            self._write_ticker(ticker, df, replace, as_of)
 
     # Method that writes the technical indicators from a ticker timeseries to the database:
-    def update_timeseries_technicals(self, ticker):
+    def update_timeseries_technicals(self, ticker, commit=True):
         '''
         Method queries the database for the price timeseries data based on input
         ticker. It uses this historical price data to calculate various technical
@@ -147,99 +589,335 @@ class stock_timeseries_api(object):
             This is the string that represents the ticker symbol of the security
             in the database. In this method the ticker string is used to query
             the price timeseries and write the technicals database table.
+
+        commit : bool
+            Whether the technicals table is written in its own transaction that is
+            committed once it is written. It is by default True.
+        '''
+        with self._transaction(commit):
+            self._write_technicals(ticker)
+
+    # Method that calculates and writes the technicals of a ticker inside the open transaction:
+    def _write_technicals(self, ticker, start_date=None):
+        '''
+        Method contains the logic of update_timeseries_technicals(), writing the
+        {ticker}_technicals table without opening or committing a transaction.
+
+        The exponential moving averages depend on every earlier price, so when the
+        whole table is written they are calculated over the whole price history.
+        If a start date is given only the rows from that date onwards are written,
+        as the earlier rows are unchanged, and the averages are continued from the
+        state saved in the Technicals_State table by the previous write so only
+        the newer prices have to be read and calculated.
+
+        Parameters
+        ----------
+        ticker : str
+            This is the string that represents the ticker symbol of the security
+            in the database.
+
+        start_date : str
+            The 'yyyy-mm-dd' first date of the technicals rows being written. It is
+            by default None, in which case the whole table is replaced.
         '''
         # Creating the name of the ticker technicals table:
         table_name = f"{ticker}_technicals"
 
-        # Creating database table for the ticker technicals:
-        self.c.execute(
-            f"""CREATE TABLE IF NOT EXISTS {table_name} (
-                Date TEXT Primary Key,
-                Close_Price REAL,
-                One_M_Volatility REAL,
-                Three_M_Volatility REAL,
-                Twelve_SMA REAL,
-                Twenty_Six_SMA REAL,
-                Fifty_SMA REAL,
-                Two_Hundred_SMA REAL,
-                Twelve_EMA REAL,
-                Twenty_Six_EMA REAL,
-                Fifty_EMA REAL,
-                Two_Hundred_EMA REAL,
-                MACD REAL,
-                RSI REAL)""")
-
-        # Attempting to extract a dataframe of historical price data for ticker:
+        # Creating database table for the ticker technicals if it does not exist:
+        if table_name not in self._known_tables:
+            self.c.execute(
+                f"""CREATE TABLE IF NOT EXISTS {table_name} (
+                    Date TEXT Primary Key,
+                    Close_Price REAL,
+                    One_M_Volatility REAL,
+                    Three_M_Volatility REAL,
+                    Twelve_SMA REAL,
+                    Twenty_Six_SMA REAL,
+                    Fifty_SMA REAL,
+                    Two_Hundred_SMA REAL,
+                    Twelve_EMA REAL,
+                    Twenty_Six_EMA REAL,
+                    Fifty_EMA REAL,
+                    Two_Hundred_EMA REAL,
+                    MACD REAL,
+                    RSI REAL)""")
+
+            self._known_tables.add(table_name)
+
+        # Reading the saved state of the exponentially weighted averages if only the
+        # rows from the start date are being written, it can only be continued from
+        # if it was saved before the start date:
+        state_date, states = (None, {}) if start_date == None else self._technicals_state(ticker)
+
+        if state_date != None and state_date >= start_date:
+            state_date, states = None, {}
+
+        # Attempting to extract a dataframe of historical price data for ticker,
+        # only the Close column is used so the other price columns are not read.
+        # If the averages are continued from their saved state only the prices after
+        # the state's date and the 200 prices before it (for the rolling windows) are read:
         try:
-            price_df = pd.read_sql_query(f"SELECT * FROM {ticker}_timeseries", con = self.con)
+            if state_date == None:
+                price_df = pd.read_sql_query(f"SELECT Date, Close FROM {ticker}_timeseries", con = self.con)
+
+            else:
+                price_df = pd.read_sql_query(
+                    f"""SELECT Date, Close FROM {ticker}_timeseries WHERE Date >= COALESCE(
+                        (SELECT Date FROM {ticker}_timeseries WHERE Date <= :state_date
+                        ORDER BY Date DESC LIMIT 1 OFFSET 199), '') ORDER BY Date""",
+                    con = self.con, params = {'state_date': state_date})
+
             price_df.set_index('Date', inplace=True)
 
-        except: # If the price timeseries does not exist halt the process.
+        except pd.errors.DatabaseError: # If the price timeseries does not exist halt the process.
 
             raise Exception('[ERROR]: Attempting to write technicals with no price data to database')
 
-        # Creating the dataframe of technical indicators to be populated:
-        technical_df = pd.DataFrame(
-            columns = [
-                'Close_Price', 'One_M_Volatility', 'Three_M_Volatility', 'Twelve_SMA',
-                'Twenty_Six_SMA', 'Fifty_SMA', 'Two_Hundred_SMA', 'Twelve_EMA', 'Twenty_Six_EMA',
-                'Fifty_EMA', 'Two_Hundred_EMA', 'MACD', 'RSI'
-                    ],
-            index = price_df.index
-            )
+        # The number of prices up to the state's date, only read for the rolling windows:
+        close = price_df['Close'].to_numpy(dtype=np.float64)
+        n_prior = 0 if state_date == None else int((price_df.index <= state_date).sum())
+
+        # Calculating the Simple Moving Averages and the return volatilities in a
+        # single sweep over the numpy Close buffer:
+        sma, volatility = rolling_stats(close, (12, 26, 50, 200), (21, 63))
 
-        # Inserting the price_df Close column into the technicals dataframe:
-        technical_df.Close_Price = price_df.Close
+        # Calculating the four Exponential Moving Averages from the same buffer in a
+        # single pass (using alpha = 2/(span+1)) and the RSI's average gains and losses
+        # with a period of 14 days, continuing each average from its saved state:
+        up_change, down_change = _price_changes(close)
+        ewm_values = {'Close': close, 'Up_Change': up_change, 'Down_Change': down_change}
 
-        # Calculating and inserting Annualized Volatility data:
-        technical_df.One_M_Volatility = technical_df.Close_Price.pct_change().rolling(21).std()*(252**0.5) # 1-Month
-        technical_df.Three_M_Volatility = technical_df.Close_Price.pct_change().rolling(63).std()*(252**0.5) # 3-Month
+        # Grouping the averages of the same values so each group is one pass:
+        ewm_groups = {}
+        for indicator, (source, alpha, min_periods) in _EWM_INDICATORS.items():
+            ewm_groups.setdefault((source, min_periods), []).append(indicator)
 
-        # Calculating and inserting the Simple Moving Averages:
-        technical_df.Twelve_SMA = technical_df.Close_Price.rolling(12).mean() # 12-Day
-        technical_df.Twenty_Six_SMA = technical_df.Close_Price.rolling(26).mean() # 26-Day
-        technical_df.Fifty_SMA = technical_df.Close_Price.rolling(50).mean() # 50-Day
-        technical_df.Two_Hundred_SMA = technical_df.Close_Price.rolling(200).mean() # 200-Day
+        ewms, checkpoints = {}, {}
+        for (source, min_periods), indicators in ewm_groups.items():
+            result, checkpoint = _ewm_mean_checkpoint(
+                ewm_values[source][n_prior:],
+                np.array([_EWM_INDICATORS[indicator][1] for indicator in indicators]), min_periods,
+                np.array([states.get(indicator, [np.nan, 1.0, 0.0]) for indicator in indicators]))
 
-        # Calculating and inserting the Exponential Moving Averages:
-        technical_df.Twelve_EMA = technical_df.Close_Price.ewm(span=12).mean() # 12-Day
-        technical_df.Twenty_Six_EMA = technical_df.Close_Price.ewm(span=24).mean() # 24-Day
-        technical_df.Fifty_EMA = technical_df.Close_Price.ewm(span=50).mean() # 50-Day
-        technical_df.Two_Hundred_EMA = technical_df.Close_Price.ewm(span=200).mean() # 200-Day
+            ewms.update(zip(indicators, result))
+            checkpoints.update(zip(indicators, checkpoint))
 
-        # Calculating and inserting the MACD value:
-        technical_df.MACD = (technical_df.Twelve_EMA - technical_df.Twenty_Six_EMA)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - 100/(1 + ewms['RSI_Up']/ewms['RSI_Down'])
 
-        # Calculating and inserting RSI Value with period of 14 days:
-        technical_df.RSI = stock_timeseries_api.calc_rsi(technical_df.Close_Price, 14)
+        # Building the dataframe of technical indicators from the float64 arrays in
+        # one constructor call:
+        technical_df = pd.DataFrame(
+            {
+                'Close_Price': close[n_prior:],
+                'One_M_Volatility': volatility[0, n_prior:]*(252**0.5), # 1-Month
+                'Three_M_Volatility': volatility[1, n_prior:]*(252**0.5), # 3-Month
+                'Twelve_SMA': sma[0, n_prior:], # 12-Day
+                'Twenty_Six_SMA': sma[1, n_prior:], # 26-Day
+                'Fifty_SMA': sma[2, n_prior:], # 50-Day
+                'Two_Hundred_SMA': sma[3, n_prior:], # 200-Day
+                'Twelve_EMA': ewms['Twelve_EMA'],
+                'Twenty_Six_EMA': ewms['Twenty_Six_EMA'],
+                'Fifty_EMA': ewms['Fifty_EMA'],
+                'Two_Hundred_EMA': ewms['Two_Hundred_EMA'],
+                'MACD': ewms['Twelve_EMA'] - ewms['Twenty_Six_EMA'],
+                'RSI': rsi
+            },
+            index = price_df.index[n_prior:],
+            dtype = np.float64
+            )
+
+        # Writing the technicals dataframe to the database, either replacing the table
+        # or upserting the rows from the start date (the index holds ISO date strings):
+        if start_date == None:
+            self._replace_table(table_name, technical_df)
 
-        # Writing the technicals dataframe to the database:
-        technical_df.to_sql(table_name, con=self.con, if_exists='replace')
+        else:
+            self._bulk_insert(table_name, technical_df[technical_df.index >= start_date])
+
+        # Saving the state of the averages as of the second to last price, so that the
+        # next update can continue them even if it re-downloads the last price:
+        if len(technical_df) > 0 and len(price_df) > 1:
+            self.c.executemany(
+                """INSERT OR REPLACE INTO Technicals_State (Ticker, Indicator, Date, Weighted, Old_Wt, Nobs)
+                VALUES (?, ?, ?, ?, ?, ?)""",
+                [(ticker, indicator, price_df.index[-2], *checkpoint.tolist())
+                for indicator, checkpoint in checkpoints.items()])
 
         # Debug Print:
         print(f'[WRITTEN]: {ticker} Technicals\n')
 
-        self.con.commit()
+    # Method that reads the saved state of a ticker's exponentially weighted averages:
+    def _technicals_state(self, ticker):
+        '''
+        Method queries the Technicals_State table for the state of each exponentially
+        weighted average of a ticker's technicals saved by _write_technicals().
+
+        Parameters
+        ----------
+        ticker : str
+            This is the ticker symbol of the security being queried.
+
+        Returns
+        -------
+        state_date : str
+            The 'yyyy-mm-dd' date of the last price included in the saved state. It
+            is None if there is no complete state saved for the ticker.
+
+        states : dict
+            The dictionary of the float64 [weighted average, sum of weights, number
+            of observations] state arrays of each average, keyed by indicator.
+        '''
+        rows = self.c.execute(
+            "SELECT Indicator, Date, Weighted, Old_Wt, Nobs FROM Technicals_State WHERE Ticker = ?",
+            (ticker,)).fetchall()
+
+        # Only using the state if every average was saved as of the same date:
+        if {row[0] for row in rows} != set(_EWM_INDICATORS) or len({row[1] for row in rows}) != 1:
+            return None, {}
+
+        return rows[0][1], {row[0]: np.array(row[2:], dtype=np.float64) for row in rows}
 
     # Method that writes a list of ticker symbols to the database using the update_ticker():
-    def update_tickers(self, ticker_lst):
+    def update_tickers(self, ticker_lst, max_workers=8, initial_period='max', force=False, chunk_size=50):
         '''
-        Method that ingests a list of ticker strings and iterates through the list
-        and writes each individual ticker to the database via the update_ticker()
-        method.
+        Method that ingests a list of ticker strings and writes each individual
+        ticker to the database the same way as the update_ticker() method.
+
+        The tickers that share a download range (the tickers not yet in the
+        database, or the tickers last updated on the same date) are downloaded
+        in chunks with a single yf.download() call per chunk. The Yahoo Finance
+        downloads are network bound so the chunks are run concurrently on a
+        thread pool. Once every chunk is downloaded the database writes are
+        performed one at a time on the calling thread.
+
+        All of the tickers are written inside a single transaction that is only
+        committed once the whole list has been iterated through. It is opened
+        after the downloads so the write lock is not held while they run. Each
+        ticker is written under its own savepoint so that a ticker that fails to
+        update is rolled back without discarding the rest of the batch.
 
         ticker_lst : lst
             A list of ticker strings to be written/maintained to the database.
+
+        max_workers : int
+            The number of threads used to download ticker data. It is by default 8.
+
+        initial_period : str
+            The yfinance period string of the price history downloaded for each
+            ticker that is not yet in the database, see update_ticker(). It is by
+            default 'max'.
+
+        force : bool
+            Whether tickers whose Last_updated value in the Summary table is
+            already today's date, or that have failed to update 3 times in a row
+            with the last failure in the past 24 hours, are updated anyway. It is
+            by default False, in which case they are skipped.
+
+        chunk_size : int
+            The maximum number of tickers downloaded in a single yf.download()
+            call. It is by default 50.
+
+        Returns
+        -------
+        batch_errors : list
+            A list of (ticker, exception) tuples for every ticker that failed to
+            update. It is also stored as the _last_batch_errors attribute.
         '''
-        # Iterating through the list of ticker strings:
+        # Resetting the record of the tickers that failed to update:
+        self._last_batch_errors = []
+
+        # Reading the clock once so every ticker in the batch shares a Last_updated date:
+        as_of = datetime.now().date()
+
+        # Removing the tickers that were already updated today from the batch:
+        if not force:
+            updated_tickers = self._updated_tickers(ticker_lst, as_of)
+
+            for ticker in updated_tickers:
+                print(f'[SKIPPED]: {ticker} already updated {as_of}')
+
+            ticker_lst = [ticker for ticker in ticker_lst if ticker not in updated_tickers]
+
+            # Removing the tickers that failed on 3 or more consecutive updates, the most
+            # recent within the last 24 hours, so dead tickers are not downloaded every run:
+            bad_tickers = self._bad_tickers(ticker_lst, datetime.now() - timedelta(hours=24), 3)
+
+            for ticker in bad_tickers:
+                print(f'[SKIPPED]: {ticker} failed to update {bad_tickers[ticker]} times')
+
+            ticker_lst = [ticker for ticker in ticker_lst if ticker not in bad_tickers]
+
+        # Querying the dates already stored for each ticker on this thread, as the
+        # worker threads do not use the database connection:
+        stored_ranges = {ticker: self._stored_range(ticker) for ticker in ticker_lst}
+
+        # Grouping the tickers by the date their download starts from (None for the
+        # tickers downloaded over the initial_period) and splitting each group into chunks:
+        ticker_groups = {}
         for ticker in ticker_lst:
+            stored_range = stored_ranges[ticker]
+            ticker_groups.setdefault(None if stored_range == None else stored_range[1], []).append(ticker)
 
-            # Attempting to write each ticker string in the list:
-            try:
-                self.update_ticker(ticker)
+        chunks = [
+            (start, group[i:i+chunk_size])
+            for start, group in ticker_groups.items() for i in range(0, len(group), chunk_size)]
+
+        # Downloading the price history of every chunk of tickers on the thread pool
+        # before any writes, so the write lock is not held during the downloads:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._fetch_chunk, chunk, initial_period, start, stored_ranges)
+                for start, chunk in chunks]
+
+            histories = [history for future in as_completed(futures) for history in future.result()]
+
+        # Opening the single write transaction for the whole batch of tickers, which is
+        # committed once every ticker is written and rolled back if the batch raises:
+        with self._transaction(mode='IMMEDIATE'):
+
+            # Writing each downloaded ticker to the database:
+            for i, (ticker, history, error) in enumerate(histories):
+
+                # Marking a savepoint that the ticker can be rolled back to, along with
+                # the tables that exist at it:
+                self.con.execute(f"SAVEPOINT t_{i}")
+                known_tables = set(self._known_tables)
+
+                # Attempting to write each ticker string in the list:
+                try:
+                    if error != None:
+                        raise error
+
+                    self._write_ticker(ticker, *history, as_of)
+                    self.con.execute(f"RELEASE SAVEPOINT t_{i}")
+
+                except Exception as e:
+                    self.con.execute(f"ROLLBACK TO SAVEPOINT t_{i}")
+                    self.con.execute(f"RELEASE SAVEPOINT t_{i}")
+
+                    # Recording the failed ticker rather than silently skipping it, both
+                    # for this batch and in the Bad_Tickers table for later batches:
+                    self._last_batch_errors.append((ticker, e))
+                    print(f'[FAILED]: {ticker} ({e!r})')
+
+                    self.c.execute(
+                        """INSERT INTO Bad_Tickers (Ticker, Last_failed, Failures)
+                        VALUES (:ticker, :Last_failed, 1) ON CONFLICT(Ticker) DO UPDATE SET
+                        Last_failed = excluded.Last_failed, Failures = Failures + 1""",
+                        {'ticker': ticker, 'Last_failed': datetime.now().isoformat(timespec='seconds')})
+
+                    # Forgetting only the tables whose creation was just rolled back:
+                    self._known_tables = known_tables
+
+        # Refreshing the query planner statistics of the tables the batch rewrote:
+        self.c.execute("PRAGMA optimize")
 
-            except:
-                pass
+        # Checkpointing the batch into the database file and truncating the WAL file,
+        # so a large batch does not leave a large WAL file slowing subsequent reads:
+        self.c.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+
+        return self._last_batch_errors
 
     # Method that contains all the logic for updating tickers based on Summary table in database:
     def maintain_db(self):
@@ -247,12 +925,464 @@ class stock_timeseries_api(object):
         This method is designed to 'maintain'/update an existing database by
         extracting the list of ticker's stored in the Summary table and calling
         the update_tickers() method to update each ticker's data in the database.
+
+        Returns
+        -------
+        batch_errors : list
+            The list of (ticker, exception) tuples of the tickers that failed to
+            update, as returned by update_tickers().
         '''
         # Creating the list of ticker strings from Summary table via list comprehension:
         ticker_lst = [ticker[0] for ticker in self.c.execute('SELECT Ticker FROM Summary')]
 
         # Calling the update_tickers() method to update all tickers in the list:
-        self.update_tickers(ticker_lst)
+        return self.update_tickers(ticker_lst)
+
+    # Method that queries which tickers in a list were last updated on a given date:
+    def _updated_tickers(self, ticker_lst, as_of):
+        '''
+        Method queries the Summary table for the tickers in a list whose
+        Last_updated value is the as_of date, and whose price table exists.
+
+        Parameters
+        ----------
+        ticker_lst : lst
+            A list of ticker strings being checked.
+
+        as_of : datetime.date
+            The date the tickers' Last_updated values are compared against.
+
+        Returns
+        -------
+        updated_tickers : set
+            The set of ticker strings that were already updated on the as_of date.
+        '''
+        updated_tickers = {
+            ticker[0] for ticker in self.c.execute(
+                "SELECT Ticker FROM Summary WHERE Last_updated = ?", (as_of.isoformat(),))}
+
+        return {
+            ticker for ticker in ticker_lst
+            if ticker in updated_tickers and f'{ticker}_timeseries' in self._known_tables}
+
+    # Method that queries which tickers in a list have repeatedly failed to update:
+    def _bad_tickers(self, ticker_lst, since, max_failures):
+        '''
+        Method queries the Bad_Tickers table for the tickers in a list that have
+        failed to update at least max_failures consecutive times, the most recent
+        of which was after the since timestamp.
+
+        Parameters
+        ----------
+        ticker_lst : lst
+            A list of ticker strings being checked.
+
+        since : datetime.datetime
+            The timestamp the tickers' most recent failures are compared against.
+
+        max_failures : int
+            The number of consecutive failures after which a ticker is skipped.
+
+        Returns
+        -------
+        bad_tickers : dict
+            The dictionary of the number of consecutive failures of each ticker that
+            is skipped, keyed by ticker.
+        '''
+        bad_tickers = dict(self.c.execute(
+            "SELECT Ticker, Failures FROM Bad_Tickers WHERE Failures >= ? AND Last_failed >= ?",
+            (max_failures, since.isoformat(timespec='seconds'))))
+
+        return {ticker: bad_tickers[ticker] for ticker in ticker_lst if ticker in bad_tickers}
+
+    # Method that queries the first and last dates stored in a ticker's timeseries table:
+    def _stored_range(self, ticker):
+        '''
+        Method queries the earliest and most recent dates in the {ticker}_timeseries
+        table. The Date primary key index makes both of these index lookups rather
+        than table scans.
+
+        Parameters
+        ----------
+        ticker : str
+            This is the ticker symbol of the security being queried.
+
+        Returns
+        -------
+        stored_range : tuple or None
+            A (first_date, last_date) tuple of datetime.date objects or None if the
+            table does not exist or is empty.
+        '''
+        ticker_table = f'{ticker}_timeseries'
+
+        if ticker_table not in self._known_tables:
+            return None
+
+        first_date, last_date = self.c.execute(
+            f"SELECT MIN(Date), MAX(Date) FROM {ticker_table}").fetchone()
+
+        if last_date == None:
+            return None
+
+        return (
+            datetime.strptime(first_date, '%Y-%m-%d').date(),
+            datetime.strptime(last_date, '%Y-%m-%d').date())
+
+    # Method that downloads the price history of a chunk of tickers from Yahoo Finance:
+    def _fetch_chunk(self, tickers, period, start, stored_ranges):
+        '''
+        Method downloads the price history of a chunk of tickers that share a
+        download range with a single yf.download() call and formats each ticker's
+        history with the _fetch_history() method. If the chunk download fails, or
+        returns no rows for a ticker, that ticker is downloaded on its own by
+        _fetch_history() so the ticker's own error is the one that is recorded.
+
+        It does not use the database connection so it can be run on a worker thread.
+
+        Parameters
+        ----------
+        tickers : lst
+            The list of ticker strings being downloaded.
+
+        period : str
+            The yfinance period string downloaded if the tickers have no price data
+            stored.
+
+        start : datetime.date
+            The most recent date stored for every ticker in the chunk, the date the
+            download starts from. None if the tickers have no price data stored.
+
+        stored_ranges : dict
+            The dictionary of the (first_date, last_date) tuples of the dates already
+            stored for each ticker, as returned by _stored_range().
+
+        Returns
+        -------
+        histories : list
+            A list of (ticker, (df, replace), exception) tuples, one per ticker. The
+            (df, replace) tuple is the one returned by _fetch_history() and is None
+            if the download failed, in which case the exception is set.
+        '''
+        # Downloading every ticker in the chunk over the same range in a single call:
+        try:
+            download_range = {'period': period} if start == None else {'start': start.isoformat()}
+            data = yf.download(
+                tickers, group_by='ticker', actions=True, auto_adjust=True,
+                threads=True, progress=False, **download_range)
+
+            # Ensuring a single ticker chunk is also keyed by its ticker:
+            if not isinstance(data.columns, pd.MultiIndex):
+                data = pd.concat({tickers[0]: data}, axis=1)
+
+        except Exception:
+            data = None
+
+        # Mapping the downloaded column keys back to the tickers, as yf.download()
+        # upper-cases the ticker symbols it is given:
+        columns = {} if data is None else {
+            str(key).upper(): key for key in data.columns.get_level_values(0).unique()}
+
+        histories = []
+        for ticker in tickers:
+
+            # Dropping the dates that were only downloaded for the other tickers:
+            if ticker.upper() in columns:
+                history = data[columns[ticker.upper()]].dropna(how='all')
+
+            else:
+                history = None
+
+            try:
+                histories.append((ticker, self._fetch_history(
+                    ticker, period, stored_ranges[ticker],
+                    history if history is not None and len(history) > 0 else None), None))
+
+            except Exception as e:
+                histories.append((ticker, None, e))
+
+        return histories
+
+    # Method that downloads the price history of a ticker from Yahoo Finance:
+    def _fetch_history(self, ticker, period='max', stored_range=None, history=None):
+        '''
+        Method calls the Yahoo Finance API for the price history of a ticker
+        and formats the resulting dataframe into the schema of the {ticker}_timeseries
+        table.
+
+        If the ticker already has price data stored only the data from the most
+        recent stored date onwards is downloaded (the most recent date is downloaded
+        again as it may have been a partial intraday bar). However the Yahoo Finance
+        prices are adjusted for dividends and splits, so if the new data contains a
+        dividend or a split every stored price has changed and the whole stored date
+        range is downloaded again to replace the table.
+
+        This method does not touch the database connection so that it can be run
+        from the worker threads in update_tickers().
+
+        Parameters
+        ----------
+        ticker : str
+            This is the ticker symbol of the security being downloaded.
+
+        period : str
+            The yfinance period string of the price history downloaded if the ticker
+            has no price data stored. It is by default 'max'.
+
+        stored_range : tuple
+            The (first_date, last_date) tuple of the dates already stored for the
+            ticker, as returned by _stored_range(). It is by default None.
+
+        history : pandas dataframe
+            The price history of the ticker already downloaded over the same range,
+            by yf.download() in _fetch_chunk(). It is by default None, in which case
+            it is downloaded from the ticker's yfinance Ticker object.
+
+        Returns
+        -------
+        df : pandas dataframe
+            The dataframe of the ticker's price history indexed by 'yyyy-mm-dd'
+            Date strings.
+
+        replace : bool
+            Whether the dataframe replaces the ticker's stored price data (True) or
+            is appended to it (False).
+        '''
+        # Initalizing the Yahoo Finance API Ticker method, reusing a cached object:
+        if ticker not in self._ticker_cache:
+            self._ticker_cache[ticker] = yf.Ticker(ticker)
+
+        ticker_obj = self._ticker_cache[ticker]
+
+        # Downloading either the full period or only the data since the last stored date,
+        # unless it has already been downloaded:
+        if stored_range == None:
+            df = _retry(lambda: ticker_obj.history(period = period)) if history is None else history
+            replace = True
+
+        else:
+            first_date, last_date = stored_range
+            df = _retry(lambda: ticker_obj.history(start = last_date.isoformat())) if history is None else history
+            replace = False
+
+            # Re-downloading the stored date range if a dividend or split re-adjusted it:
+            new_df = df[df.index.date > last_date]
+
+            if (new_df['Dividends'] != 0).any() or (new_df['Stock Splits'] != 0).any():
+                df = _retry(lambda: ticker_obj.history(start = first_date.isoformat()))
+                replace = True
+
+        # Formatting the dataframe of timeseries for database, the Dates are formatted
+        # into the ISO strings stored in the table in a single vectorized call:
+        df = df.rename(columns = {'Stock Splits': 'Stock_Splits'})
+        df.reset_index(inplace=True)
+        df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+        df.set_index('Date', inplace = True)
+
+        return df, replace
+
+    # Method that writes a downloaded price history and its technicals to the database:
+    def _write_ticker(self, ticker, df, replace, as_of):
+        '''
+        Method writes a price history dataframe returned by _fetch_history() to
+        the {ticker}_timeseries table, creating the table if it does not exist,
+        then writes the ticker's technicals and updates the Summary table. None
+        of these writes are committed, they are made in the caller's transaction.
+
+        If the dataframe only holds the most recent price data it is upserted into
+        the table and only the technicals from its first date onwards are written.
+
+        Parameters
+        ----------
+        ticker : str
+            This is the ticker symbol of the security being written.
+
+        df : pandas dataframe
+            The dataframe of the ticker's price history indexed by 'yyyy-mm-dd'
+            Date strings.
+
+        replace : bool
+            Whether the dataframe replaces all of the ticker's stored data (True) or
+            is appended to it (False).
+
+        as_of : datetime.date
+            The date written to the ticker's Last_updated value in the Summary table.
+        '''
+        # Creating the tablename for the ticker:
+        ticker_table = f'{ticker}_timeseries'
+
+        # Creating the ticker table if it does not exist:
+        if ticker_table not in self._known_tables:
+            self.c.execute(
+                f"""CREATE TABLE IF NOT EXISTS {ticker_table} (
+                    Date TEXT Primary Key,
+                    Open REAL,
+                    High REAL,
+                    Low REAL,
+                    Close REAL,
+                    Volume INTEGER,
+                    Dividends REAL,
+                    Stock_Splits REAL)""")
+
+            self._known_tables.add(ticker_table)
+
+        # Writing dataframe to database, either replacing or appending to the table:
+        price_df = df[['Open', 'High', 'Low', 'Close', 'Volume', 'Dividends', 'Stock_Splits']]
+
+        if replace:
+            self._replace_table(ticker_table, price_df)
+
+        else:
+            self._bulk_insert(ticker_table, price_df)
+
+        # Debug print:
+        print(f'[WRITTEN]: {ticker} Timeseries')
+
+        # Writing the technical data to the database, only the rows from the first
+        # appended date onwards have changed if the price data was appended:
+        if replace:
+            self._write_technicals(ticker)
+
+        elif len(df) > 0:
+            self._write_technicals(ticker, start_date=df.index.min())
+
+        # Updating/Writing data to the Summary Data table:
+        self.c.execute(
+            """INSERT OR REPLACE INTO Summary (Ticker, Last_updated)
+            VALUES (:ticker, :Last_updated)""",
+            {'ticker':ticker, 'Last_updated': as_of})
+
+        # Clearing any record of the ticker's previous failures:
+        self.c.execute("DELETE FROM Bad_Tickers WHERE Ticker = ?", (ticker,))
+
+    # Method that adds a unique Date index to ticker tables created without a primary key:
+    def _index_legacy_tables(self):
+        '''
+        Method finds the ticker tables in the database that have no unique index,
+        such as the tables older versions wrote via df.to_sql(if_exists='replace'),
+        and gives them a unique index on Date so that the ON CONFLICT(Date) upsert
+        in _bulk_insert() can be used on them.
+
+        Any duplicated dates in these tables are removed first, keeping the most
+        recently inserted row for each date.
+        '''
+        # Querying the ticker tables that do not have any unique index:
+        legacy_tables = [table[0] for table in self.c.execute(
+            """SELECT name FROM sqlite_master AS m
+            WHERE type='table'
+            AND (name LIKE '%!_timeseries' ESCAPE '!' OR name LIKE '%!_technicals' ESCAPE '!')
+            AND NOT EXISTS (SELECT 1 FROM pragma_index_list(m.name) WHERE "unique" = 1)""")]
+
+        with self._transaction():
+            for table_name in legacy_tables:
+
+                # Removing duplicated dates and adding the unique index:
+                self.c.execute(
+                    f"""DELETE FROM {table_name} WHERE rowid NOT IN (
+                        SELECT MAX(rowid) FROM {table_name} GROUP BY Date)""")
+                self.c.execute(f"CREATE UNIQUE INDEX {table_name}_Date ON {table_name}(Date)")
+
+    # Context manager that wraps a block of database writes in a single transaction:
+    @contextmanager
+    def _transaction(self, begin=True, mode=''):
+        '''
+        Context manager that opens a transaction with BEGIN, commits it if the
+        block completes and rolls it back if the block raises. On a rollback the
+        _known_tables set is restored to its contents before the transaction,
+        forgetting the tables whose creation was rolled back.
+
+        Parameters
+        ----------
+        begin : bool
+            Whether a transaction is opened at all. If False the block is run as is
+            inside whatever transaction the caller already has open. It is by
+            default True.
+
+        mode : str
+            The transaction mode passed to BEGIN, 'IMMEDIATE' takes the write lock
+            when the transaction is opened rather than on its first write. It is by
+            default '', a deferred transaction.
+        '''
+        if not begin:
+            yield
+            return
+
+        # Keeping a copy of the known tables, as any table created in the transaction
+        # no longer exists once it is rolled back:
+        known_tables = set(self._known_tables)
+
+        self.con.execute(f"BEGIN {mode}")
+
+        try:
+            yield
+
+        except:
+            self.con.execute("ROLLBACK")
+            self._known_tables = known_tables
+            raise
+
+        self.con.execute("COMMIT")
+
+    # Method that replaces the contents of a database table with a dataframe:
+    def _replace_table(self, table_name, df):
+        '''
+        Method deletes every row of an existing database table and writes the rows
+        of the input dataframe in its place via the _bulk_insert() method.
+
+        Unlike df.to_sql() this does not commit the connection, so the write stays
+        inside whatever transaction is currently open (see _transaction()).
+
+        Parameters
+        ----------
+        table_name : str
+            The name of the database table being replaced. The table must already
+            exist with columns matching the dataframe index ('Date') and columns.
+
+        df : pandas dataframe
+            The dataframe being written to the table, indexed by Date.
+        '''
+        # Replacing the contents of the table:
+        self.c.execute(f"DELETE FROM {table_name}")
+        self._bulk_insert(table_name, df)
+
+    # Method that inserts the rows of a dataframe into a database table:
+    def _bulk_insert(self, table_name, df):
+        '''
+        Method writes every row of the input dataframe to an existing database
+        table with a single prepared executemany() statement.
+
+        The statement is an upsert (INSERT ... ON CONFLICT(Date) DO UPDATE) so that
+        a date that is already in the table, such as the duplicated most recent bar
+        Yahoo Finance returns over a weekend, has its row updated with the newer
+        values rather than raising on the Date primary key.
+
+        Parameters
+        ----------
+        table_name : str
+            The name of the database table being written to. The table must already
+            exist with columns matching the dataframe index ('Date') and columns.
+
+        df : pandas dataframe
+            The dataframe being written to the table, indexed by Date.
+        '''
+        # Building the insert statement from the dataframe columns, reusing the cached
+        # string so that sqlite3 finds the already prepared statement:
+        columns = ('Date',) + tuple(df.columns)
+        key = ('insert', table_name, columns)
+
+        if key not in self._stmt_cache:
+            self._stmt_cache[key] = f"""INSERT INTO {table_name} ({', '.join(columns)})
+                VALUES ({', '.join('?' * len(columns))})
+                ON CONFLICT(Date) DO UPDATE SET
+                {', '.join(f'{column}=excluded.{column}' for column in columns[1:])}"""
+
+        insert_sql = self._stmt_cache[key]
+
+        # Converting the Date index to the ISO date strings stored in the database and
+        # the dataframe to a numpy record array, whose tolist() builds the row tuples
+        # of python scalars in C rather than iterating the dataframe row by row:
+        rows = df.reset_index().astype({'Date': str}).to_records(index=False).tolist()
+
+        self.c.executemany(insert_sql, rows)
 
 # <---------------------------Database Reading Methods------------------------->
 
@@ -323,64 +1453,43 @@ class stock_timeseries_api(object):
         timeseries_table_name = f'{ticker}_timeseries'
         technicals_table_name = f'{ticker}_technicals'
 
-        # Extracting the dataframe sfrom the database:
-        ticker_timeseries_df = pd.read_sql_query(f"SELECT * FROM {timeseries_table_name}", self.con)
-        ticker_technicals_df = pd.read_sql_query(f"SELECT * FROM {technicals_table_name}", self.con)
-
-        # Formatting the dataframes:
-        ticker_timeseries_df.Date = ticker_timeseries_df.Date.apply(
-            lambda x : datetime.strptime(x, '%Y-%m-%d').date())
-        ticker_timeseries_df.set_index('Date', inplace=True)
-
-        ticker_technicals_df.Date = ticker_technicals_df.Date.apply(
-            lambda x : datetime.strptime(x, '%Y-%m-%d').date())
-        ticker_technicals_df.set_index('Date', inplace=True)
-
-        # Conditional that handles the logic for slicing the dataframes based on
-        # start and end date:
-        if start_date != None and end_date == None: # If only a start date is provided:
-
-            # Converting the start_date to a datetime object:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-
-            # Extracting the location of the start_date value from dataframe index:
-            timeseries_start = ticker_timeseries_df.index.searchsorted(start_date)
-            technicals_start = ticker_technicals_df.index.searchsorted(start_date)
-
-            # Slicing the dataframes based on the start values:
-            ticker_timeseries_df = ticker_timeseries_df.iloc[timeseries_start:]
-            ticker_technicals_df = ticker_technicals_df.iloc[technicals_start:]
-
-
-        elif start_date == None and end_date != None: # If only an end date is provided:
-
-            # Converting the end date string to a datetime object:
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-            # Extracting the locations of the end_date value from datetime index:
-            timeseries_end = ticker_timeseries_df.index.searchsorted(end_date)
-            technicals_end = ticker_technicals_df.index.searchsorted(end_date)
-
-            # Slicing the dataframes based on the end index value:
-            ticker_timeseries_df = ticker_timeseries_df.iloc[:timeseries_end]
-            ticker_technicals_df = ticker_technicals_df.iloc[:technicals_end]
-
-        elif start_date != None and end_date != None: # If both start and end data are provided:
-
-            # Converting both start and end date to datetime object:
-            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-            # Extracting the start and end location in the dataframes:
-            timeseries_start = ticker_timeseries_df.index.searchsorted(start_date)
-            timeseries_end = ticker_timeseries_df.index.searchsorted(end_date)
-
-            technicals_start = ticker_technicals_df.index.searchsorted(start_date)
-            technicals_end = ticker_technicals_df.index.searchsorted(end_date)
-
-            # Slicing the dataframes based on the start and end values:
-            ticker_timeseries_df = ticker_timeseries_df.iloc[timeseries_start:timeseries_end]
-            ticker_technicals_df = ticker_technicals_df.iloc[technicals_start:technicals_end]
+        # Building the WHERE clause of the date range to be pushed into the queries,
+        # the dates are parsed and re-formatted so malformed dates still raise:
+        where = []
+        params = {}
+
+        if start_date != None:
+            where.append("Date >= :start_date")
+            params['start_date'] = datetime.strptime(start_date, '%Y-%m-%d').date().isoformat()
+
+        if end_date != None:
+            where.append("Date <= :end_date")
+            params['end_date'] = datetime.strptime(end_date, '%Y-%m-%d').date().isoformat()
+
+        where_clause = f" WHERE {' AND '.join(where)}" if where else ''
+
+        # Column types of the two tables, passed to pandas so that the columns do not
+        # have to be inferred (leading NULL technicals would otherwise be inferred
+        # from python None values):
+        timeseries_dtypes = {column: np.float64 for column in (
+            'Open', 'High', 'Low', 'Close', 'Dividends', 'Stock_Splits')}
+        technicals_dtypes = {column: np.float64 for column in (
+            'Close_Price', 'One_M_Volatility', 'Three_M_Volatility', 'Twelve_SMA',
+            'Twenty_Six_SMA', 'Fifty_SMA', 'Two_Hundred_SMA', 'Twelve_EMA', 'Twenty_Six_EMA',
+            'Fifty_EMA', 'Two_Hundred_EMA', 'MACD', 'RSI')}
+
+        # Extracting the dataframes from the database, only reading the rows in the date
+        # range and parsing the Date strings into the index with pandas' vectorized parser:
+        ticker_timeseries_df = pd.read_sql_query(
+            f"SELECT * FROM {timeseries_table_name}{where_clause} ORDER BY Date", self.con, params=params,
+            index_col='Date', parse_dates={'Date': {'format': '%Y-%m-%d'}}, dtype=timeseries_dtypes)
+        ticker_technicals_df = pd.read_sql_query(
+            f"SELECT * FROM {technicals_table_name}{where_clause} ORDER BY Date", self.con, params=params,
+            index_col='Date', parse_dates={'Date': {'format': '%Y-%m-%d'}}, dtype=technicals_dtypes)
+
+        # Formatting the dataframes' Date indexes into datetime.date objects:
+        ticker_timeseries_df.index = pd.Index(ticker_timeseries_df.index.date, name='Date')
+        ticker_technicals_df.index = pd.Index(ticker_technicals_df.index.date, name='Date')
 
         # Populating the dictionary:
         ticker_dict = {'price':ticker_timeseries_df, 'technicals':ticker_technicals_df}
@@ -410,27 +1519,18 @@ class stock_timeseries_api(object):
         rsi_series : pandas series
             A series of RSI values that are derived from the input data series.
         '''
-        # Creating a series of values that is the difference between each element
-        # and its previous element:
-        price_difference = data_series.diff(1)
-
-        # Creating series of value 0 with same dimensions as tbe price_difference series:
-        up_change = 0 * price_difference
-        down_change = 0 * price_difference
-
-        # Adding values to up_change series where price difference is equal to positive difference:
-        up_change[price_difference > 0] = price_difference[price_difference > 0]
-
-        # Adding values to down_change series where price difference is equal to negativce difference:
-        down_change[price_difference < 0] = price_difference[price_difference < 0]
+        # Splitting the changes between each element and its previous element into
+        # the positive and negative changes, working on the numpy buffer of the series:
+        up_change, down_change = _price_changes(data_series.to_numpy(dtype=np.float64))
 
         # Calculating the ewm of up and down change series with alpah = 1/period
         # for number of periods specified:
-        up_change_avg = up_change.ewm(com = period-1, min_periods = period).mean()
-        down_change_avg = down_change.ewm(com = period-1, min_periods = period).mean()
+        up_change_avg = ewm_mean(up_change, 1/period, period)
+        down_change_avg = ewm_mean(down_change, 1/period, period)
 
-        # Converting the result (up_change_avg/down_change_avg) to absoloute value:
-        rs_series = abs(up_change_avg/down_change_avg)
+        # Calculating the relative strength, both averages are already positive:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs_series = pd.Series(up_change_avg/down_change_avg, index=data_series.index)
 
         # Re-scalling each value in series to the RSI scale of 0 - 100:
         rsi_series = 100 - 100/(1+rs_series)